@@ -8,6 +8,36 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./brain_platform.db"
     ENVIRONMENT: str = "development"
 
+    # LLM routing: providers are tried by health and latency, with hedging
+    GROQ_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_FALLBACK_MODEL: Optional[str] = None
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    LLM_USE_FAKE_PROVIDERS: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY: float = 0.5
+    LLM_HEDGE_DEFAULT_DELAY: float = 3.0
+    LLM_MAX_HEDGES_IN_FLIGHT: int = 4
+
+    # Admission control: concurrency limit and queue depth per endpoint class
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_QUEUE: int = 32
+    TTS_MAX_CONCURRENCY: int = 4
+    TTS_MAX_QUEUE: int = 16
+    DIFFUSION_MAX_CONCURRENCY: int = 1
+    DIFFUSION_MAX_QUEUE: int = 4
+    # Longest time a request may wait in each queue before a 429
+    LLM_QUEUE_TIMEOUT: float = 30.0
+    TTS_QUEUE_TIMEOUT: float = 30.0
+    DIFFUSION_QUEUE_TIMEOUT: float = 900.0
+
+    # Curriculum batch generation
+    BATCH_MAX_CONCURRENCY: int = 8
+    BATCH_MAX_TOPICS: int = 100
+    DIFFUSION_BATCH_SIZE: int = 4
+    # Courses queued for video within this window are rendered together
+    VIDEO_RENDER_BATCH_WINDOW: float = 10.0
+    VIDEO_RENDER_MAX_SCENES: int = 32
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,8 +1,50 @@
 from langchain_groq import ChatGroq
+from langchain_openai import ChatOpenAI
 from app.core.config import settings
+from app.core.llm_router import FakeChatModel, LLMProvider, LLMRouter
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0.3,
-    api_key=settings.GROQ_API_KEY
-)
\ No newline at end of file
+
+def _build_providers():
+    """Build the provider list from settings, in order of preference"""
+    if settings.LLM_USE_FAKE_PROVIDERS:
+        return [
+            LLMProvider("fake-fast", FakeChatModel(latency=0.2, jitter=0.1)),
+            LLMProvider("fake-slow", FakeChatModel(latency=1.0, jitter=0.8, failure_rate=0.05)),
+        ]
+
+    providers = [
+        LLMProvider("groq", ChatGroq(
+            model=settings.GROQ_MODEL,
+            temperature=0.3,
+            api_key=settings.GROQ_API_KEY
+        ))
+    ]
+
+    if settings.GROQ_FALLBACK_MODEL:
+        providers.append(LLMProvider("groq-fallback", ChatGroq(
+            model=settings.GROQ_FALLBACK_MODEL,
+            temperature=0.3,
+            api_key=settings.GROQ_API_KEY
+        )))
+
+    if settings.OPENAI_API_KEY:
+        providers.append(LLMProvider("openai", ChatOpenAI(
+            model=settings.OPENAI_MODEL,
+            temperature=0.3,
+            api_key=settings.OPENAI_API_KEY
+        )))
+
+    if len(providers) == 1:
+        print("Warning: only one LLM provider configured, hedging and failover are disabled "
+              "(set OPENAI_API_KEY or GROQ_FALLBACK_MODEL)")
+
+    return providers
+
+
+llm = LLMRouter(
+    _build_providers(),
+    hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+    hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+    hedge_default_delay=settings.LLM_HEDGE_DEFAULT_DELAY,
+    max_hedges_in_flight=settings.LLM_MAX_HEDGES_IN_FLIGHT
+)
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Union
+
+from langchain_core.messages import AIMessage
+
+from app.prompts.complete_course_prompt import COMPLETE_COURSE_TEMPLATE
+from app.prompts.course_prompt import COURSE_TEMPLATE
+from app.prompts.quiz_prompt import QUIZ_TEMPLATE
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(percentile / 100 * (len(ordered) - 1))]
+
+
+class ProviderStats:
+    """
+    Rolling window of latencies and outcomes for one provider.
+
+    Outcomes are "ok", "error" or "lost" (cancelled after losing a hedge).
+    A lost call never finished, so its true latency is unknown: it is kept
+    out of the success latencies and only counts as slower than any of them
+    when ranking providers.
+    """
+
+    OK = "ok"
+    ERROR = "error"
+    LOST = "lost"
+
+    def __init__(self, window: int = 100):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((latency, self.OK if ok else self.ERROR))
+
+    def record_lost(self, latency: float):
+        with self._lock:
+            self._samples.append((latency, self.LOST))
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def latency_percentile(self, percentile: float, include_lost: bool = False) -> Optional[float]:
+        """
+        Latency percentile over successful calls, None without data.
+
+        With `include_lost`, lost calls count as infinitely slow, so a
+        provider that mostly loses hedges has an infinite median.
+        """
+        with self._lock:
+            latencies = [latency for latency, outcome in self._samples if outcome == self.OK]
+            if include_lost:
+                latencies += [float("inf") for _, outcome in self._samples if outcome == self.LOST]
+        return _percentile(latencies, percentile) if latencies else None
+
+    def _rate(self, outcome: str) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, o in self._samples if o == outcome) / len(self._samples)
+
+    def error_rate(self) -> float:
+        return self._rate(self.ERROR)
+
+    def lost_rate(self) -> float:
+        return self._rate(self.LOST)
+
+    def snapshot(self) -> Dict:
+        return {
+            "samples": self.sample_count(),
+            "error_rate": self.error_rate(),
+            "lost_rate": self.lost_rate(),
+            "p50_latency_seconds": self.latency_percentile(50),
+            "p95_latency_seconds": self.latency_percentile(95),
+            "p99_latency_seconds": self.latency_percentile(99),
+        }
+
+
+class LLMProvider:
+    """A named chat model (anything exposing `ainvoke`) plus its rolling stats"""
+
+    def __init__(self, name: str, model, window: int = 100):
+        self.name = name
+        self.model = model
+        self.stats = ProviderStats(window)
+
+
+class LLMRouter:
+    """
+    Route LLM calls across several providers with hedged requests.
+
+    Exposes the same `invoke(prompt)` interface as a LangChain chat model.
+    Providers are tried healthiest and fastest first. If the current one has
+    not answered once its own latency percentile has elapsed, a duplicate
+    request goes to the next provider (within the hedge budget) and the first
+    success wins; the other call is cancelled. Failures fail over through the
+    whole ranked list.
+
+    Calls run as asyncio tasks on a dedicated event loop so that losing
+    requests are really cancelled instead of holding a worker thread.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.5,
+        hedge_default_delay: float = 3.0,
+        min_samples: int = 20,
+        max_error_rate: float = 0.5,
+        max_hedges_in_flight: int = 4
+    ):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_hedges_in_flight = max_hedges_in_flight
+
+        self._lock = threading.Lock()
+        self._hedges_in_flight = 0
+        self._counters = {
+            "requests": 0, "hedged": 0, "hedge_wins": 0, "hedges_skipped": 0, "failovers": 0
+        }
+        self._wins = {provider.name: 0 for provider in providers}
+
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="llm-router", daemon=True).start()
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _rank(self) -> List[LLMProvider]:
+        """Providers ordered by health, then median latency (lost calls as slowest), then config order"""
+        def score(item):
+            position, provider = item
+            unhealthy = (
+                provider.stats.sample_count() >= self.min_samples
+                and provider.stats.error_rate() > self.max_error_rate
+            )
+            median = provider.stats.latency_percentile(50, include_lost=True)
+            return (unhealthy, median if median is not None else self.hedge_default_delay, position)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=score)]
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """How long to wait on a provider before sending a hedged request"""
+        if provider.stats.sample_count() < self.min_samples:
+            return self.hedge_default_delay
+        latency = provider.stats.latency_percentile(self.hedge_percentile)
+        if latency is None:
+            return self.hedge_min_delay
+        return max(self.hedge_min_delay, latency)
+
+    def _take_hedge(self) -> bool:
+        """Reserve a hedge from the budget, so hedging cannot double the load"""
+        with self._lock:
+            if self._hedges_in_flight >= self.max_hedges_in_flight:
+                self._counters["hedges_skipped"] += 1
+                return False
+            self._hedges_in_flight += 1
+            self._counters["hedged"] += 1
+            return True
+
+    def _return_hedge(self):
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    async def _call(self, provider: LLMProvider, prompt, **kwargs):
+        start = time.monotonic()
+        try:
+            result = await provider.model.ainvoke(prompt, **kwargs)
+        except asyncio.CancelledError:
+            provider.stats.record_lost(time.monotonic() - start)
+            raise
+        except Exception:
+            provider.stats.record(time.monotonic() - start, ok=False)
+            raise
+        provider.stats.record(time.monotonic() - start, ok=True)
+        return result
+
+    async def ainvoke(self, prompt, **kwargs):
+        self._count("requests")
+        loop = asyncio.get_running_loop()
+        remaining = self._rank()
+        in_flight = {}
+        hedged_to = None
+        last_error = None
+
+        def launch():
+            provider = remaining.pop(0)
+            in_flight[asyncio.ensure_future(self._call(provider, prompt, **kwargs))] = provider
+            return provider
+
+        hedge_at = loop.time() + self.hedge_delay(launch())
+        try:
+            while in_flight:
+                timeout = None
+                if hedged_to is None and remaining and hedge_at is not None:
+                    timeout = max(0.0, hedge_at - loop.time())
+
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    if self._take_hedge():
+                        hedged_to = launch()
+                    else:
+                        hedge_at = None
+                    continue
+
+                for task in done:
+                    provider = in_flight.pop(task)
+                    if task.exception() is None:
+                        self._record_win(provider, hedged=provider is hedged_to)
+                        return task.result()
+                    last_error = task.exception()
+
+                if not in_flight and remaining:
+                    self._count("failovers")
+                    hedge_at = loop.time() + self.hedge_delay(launch())
+
+            raise last_error
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            if hedged_to is not None:
+                self._return_hedge()
+
+    def invoke(self, prompt, **kwargs):
+        """Blocking entry point used by the synchronous services"""
+        future = asyncio.run_coroutine_threadsafe(self.ainvoke(prompt, **kwargs), self._loop)
+        return future.result()
+
+    def _record_win(self, provider: LLMProvider, hedged: bool):
+        with self._lock:
+            self._wins[provider.name] += 1
+            if hedged:
+                self._counters["hedge_wins"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            wins = dict(self._wins)
+            counters["hedges_in_flight"] = self._hedges_in_flight
+        return {
+            **counters,
+            "providers": {
+                provider.name: {
+                    **provider.stats.snapshot(),
+                    "wins": wins[provider.name],
+                    "hedge_delay_seconds": self.hedge_delay(provider),
+                }
+                for provider in self.providers
+            },
+            "routing_order": [provider.name for provider in self._rank()],
+        }
+
+
+FAKE_COURSE = "This is an offline course generated by a fake LLM provider."
+
+FAKE_QUIZ = [
+    {
+        "question": "Which provider generated this course?",
+        "options": ["Groq", "OpenAI", "A fake provider", "Nobody"],
+        "answer": 2
+    }
+]
+
+FAKE_COMPLETE_PACKAGE = json.dumps({
+    "course": FAKE_COURSE,
+    "quiz": FAKE_QUIZ,
+    "video_scenes": [
+        {
+            "title": "Introduction",
+            "content": FAKE_COURSE,
+            "duration": 5,
+            "visual_prompt": "cartoon, classroom, educational content"
+        }
+    ]
+})
+
+
+def _template_prefix(template: str) -> str:
+    return template.split("{", 1)[0]
+
+
+def fake_response(prompt: str) -> str:
+    """Canned answer shaped like what the prompt template asks for"""
+    if prompt.startswith(_template_prefix(COMPLETE_COURSE_TEMPLATE)):
+        return FAKE_COMPLETE_PACKAGE
+    if prompt.startswith(_template_prefix(QUIZ_TEMPLATE)):
+        return json.dumps(FAKE_QUIZ)
+    return FAKE_COURSE
+
+
+class FakeChatModel:
+    """
+    Offline stand-in for a chat model, used to exercise routing without network.
+
+    Latency is drawn uniformly from `latency ± jitter` and calls fail with
+    probability `failure_rate`. `response` is either a fixed string or a
+    callable receiving the prompt; by default it matches the prompt template.
+    `calls` and `cancelled` count what the router did with this provider.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        response: Union[str, Callable[[str], str]] = fake_response,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.response = response
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cancelled = 0
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._random.uniform(self.latency - self.jitter, self.latency + self.jitter))
+            fail = self._random.random() < self.failure_rate
+        return delay, fail
+
+    def _respond(self, prompt, fail: bool) -> AIMessage:
+        if fail:
+            raise RuntimeError("Fake provider failure")
+        content = self.response(str(prompt)) if callable(self.response) else self.response
+        return AIMessage(content=content)
+
+    def invoke(self, prompt, **kwargs):
+        delay, fail = self._draw()
+        time.sleep(delay)
+        return self._respond(prompt, fail)
+
+    async def ainvoke(self, prompt, **kwargs):
+        delay, fail = self._draw()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.cancelled += 1
+            raise
+        return self._respond(prompt, fail)
@@ -0,0 +1,335 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Response
+
+from app.core.config import settings
+
+
+class Priority:
+    """Priority lanes, lower value is served first"""
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class QueueFullError(Exception):
+    """Raised when a request cannot be admitted to an endpoint class"""
+
+    def __init__(self, endpoint_class: str, retry_after: int):
+        self.endpoint_class = endpoint_class
+        self.retry_after = retry_after
+        super().__init__(f"'{endpoint_class}' queue is full, retry in {retry_after}s")
+
+
+def too_many_requests(error: QueueFullError) -> HTTPException:
+    """429 response for a rejected request, with a Retry-After hint"""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+class _Ticket:
+    """A queued request; `wake` is called once it is granted a slot or evicted"""
+
+    QUEUED = "queued"
+    GRANTED = "granted"
+    EVICTED = "evicted"
+
+    def __init__(self, priority: int, wake):
+        self.priority = priority
+        self.wake = wake
+        self.state = self.QUEUED
+
+
+class EndpointClass:
+    """
+    Concurrency limit plus a bounded priority queue for one class of endpoints.
+
+    Waiters can be threads (`acquire`) or asyncio tasks (`acquire_async`);
+    queued asyncio tasks do not hold a worker thread while they wait.
+    When the queue is full, a new request pushes out the newest queued request
+    of a lower priority lane (which gets a 429) instead of being rejected, so
+    background work cannot crowd interactive requests out of the queue.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._active = 0
+
+        self._admitted = 0
+        self._rejected = 0
+        self._evicted = 0
+        self._backpressure_retries = 0
+        self._waits = deque(maxlen=500)
+        self._avg_service_time = None
+
+    def _estimate_retry_after(self) -> int:
+        """Rough time until a slot frees up, based on the average service time"""
+        service_time = self._avg_service_time or 5.0
+        backlog = (len(self._waiting) + 1) / max(1, self.max_concurrency)
+        return max(1, int(round(service_time * backlog)))
+
+    def _reject(self, background: bool) -> QueueFullError:
+        """
+        Build the rejection error. Caller holds the lock.
+
+        Rejections of background work that will back off and retry are
+        counted apart, so `rejected` only reflects turned-away clients.
+        """
+        if background:
+            self._backpressure_retries += 1
+        else:
+            self._rejected += 1
+        return QueueFullError(self.name, self._estimate_retry_after())
+
+    def _evict_for(self, priority: int) -> bool:
+        """
+        Make room for a request of `priority` by evicting the newest queued
+        ticket of the lowest lower-priority lane. Caller holds the lock.
+        """
+        victims = [entry for entry in self._waiting if entry[0] > priority]
+        if not victims:
+            return False
+        victim = max(victims)
+        self._waiting.remove(victim)
+        heapq.heapify(self._waiting)
+        ticket = victim[2]
+        ticket.state = _Ticket.EVICTED
+        self._evicted += 1
+        ticket.wake()
+        return True
+
+    def _enqueue(self, priority: int, wake, background: bool):
+        """Take a slot right away (returns None) or queue a ticket. Caller holds the lock."""
+        if self._active < self.max_concurrency and not self._waiting:
+            self._active += 1
+            return None
+        if len(self._waiting) >= self.max_queue and not self._evict_for(priority):
+            raise self._reject(background)
+        ticket = _Ticket(priority, wake)
+        heapq.heappush(self._waiting, (priority, next(self._seq), ticket))
+        return ticket
+
+    def _dispatch(self):
+        """Grant free slots to the head of the queue. Caller holds the lock."""
+        while self._waiting and self._active < self.max_concurrency:
+            _, _, ticket = heapq.heappop(self._waiting)
+            self._active += 1
+            ticket.state = _Ticket.GRANTED
+            ticket.wake()
+
+    def _abandon(self, ticket: _Ticket) -> bool:
+        """
+        Withdraw a ticket that timed out or was cancelled. Caller holds the lock.
+
+        Returns True when the slot had already been granted meanwhile.
+        """
+        if ticket.state == _Ticket.GRANTED:
+            return True
+        if ticket.state == _Ticket.QUEUED:
+            self._waiting = [entry for entry in self._waiting if entry[2] is not ticket]
+            heapq.heapify(self._waiting)
+        return False
+
+    def _settle(self, ticket: _Ticket, start: float, background: bool) -> float:
+        """Turn a woken or timed-out ticket into an admission or a rejection"""
+        with self._lock:
+            if not self._abandon(ticket):
+                raise self._reject(background)
+            wait = time.monotonic() - start
+            self._record_admission(wait)
+            return wait
+
+    def acquire(self, priority: int = Priority.NORMAL, background: bool = False) -> float:
+        """Wait for a slot from a worker thread and return the time spent queued"""
+        start = time.monotonic()
+        event = threading.Event()
+
+        with self._lock:
+            ticket = self._enqueue(priority, event.set, background)
+            if ticket is None:
+                self._record_admission(0.0)
+                return 0.0
+
+        event.wait(self.queue_timeout)
+        return self._settle(ticket, start, background)
+
+    async def acquire_async(self, priority: int = Priority.NORMAL) -> float:
+        """Wait for a slot from the event loop and return the time spent queued"""
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        with self._lock:
+            ticket = self._enqueue(priority, wake, background=False)
+            if ticket is None:
+                self._record_admission(0.0)
+                return 0.0
+
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Client went away: give back a slot granted in the meantime
+            with self._lock:
+                if self._abandon(ticket):
+                    self._active -= 1
+                    self._dispatch()
+            raise
+
+        return self._settle(ticket, start, background=False)
+
+    def release(self, service_time: float):
+        with self._lock:
+            self._active -= 1
+            if self._avg_service_time is None:
+                self._avg_service_time = service_time
+            else:
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+            self._dispatch()
+
+    def _record_admission(self, wait: float):
+        self._admitted += 1
+        self._waits.append(wait)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "active": self._active,
+                "queued": len(self._waiting),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "evicted": self._evicted,
+                "backpressure_retries": self._backpressure_retries,
+                "avg_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait_seconds": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                "max_wait_seconds": waits[-1] if waits else 0.0,
+                "avg_service_seconds": self._avg_service_time or 0.0,
+            }
+
+
+class Scheduler:
+    """Admission control for the expensive endpoint classes (llm, tts, diffusion)"""
+
+    def __init__(self):
+        self.classes = {
+            "llm": EndpointClass(
+                "llm", settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE,
+                settings.LLM_QUEUE_TIMEOUT
+            ),
+            "tts": EndpointClass(
+                "tts", settings.TTS_MAX_CONCURRENCY, settings.TTS_MAX_QUEUE,
+                settings.TTS_QUEUE_TIMEOUT
+            ),
+            "diffusion": EndpointClass(
+                "diffusion", settings.DIFFUSION_MAX_CONCURRENCY, settings.DIFFUSION_MAX_QUEUE,
+                settings.DIFFUSION_QUEUE_TIMEOUT
+            ),
+        }
+
+    @contextmanager
+    def admit(self, endpoint_class: str, priority: int = Priority.NORMAL):
+        """
+        Hold a slot of the given endpoint class for the duration of the block.
+
+        Yields the time spent waiting in the queue. Raises QueueFullError when
+        the queue is full or the wait exceeds the class queue timeout.
+        """
+        slot = self.classes[endpoint_class]
+        wait = slot.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield wait
+        finally:
+            slot.release(time.monotonic() - start)
+
+    @contextmanager
+    def admit_with_backpressure(
+        self,
+        endpoint_class: str,
+        priority: int = Priority.NORMAL,
+        stop: Optional[threading.Event] = None
+    ):
+        """
+        Same as `admit` for background work: a full queue means wait
+        `retry_after` and try again rather than fail. QueueFullError is only
+        raised if `stop` gets set while backing off.
+        """
+        slot = self.classes[endpoint_class]
+        while True:
+            try:
+                wait = slot.acquire(priority, background=True)
+                break
+            except QueueFullError as e:
+                if stop is None:
+                    time.sleep(e.retry_after)
+                elif stop.wait(e.retry_after):
+                    raise
+        start = time.monotonic()
+        try:
+            yield wait
+        finally:
+            slot.release(time.monotonic() - start)
+
+    @asynccontextmanager
+    async def admit_async(self, endpoint_class: str, priority: int = Priority.NORMAL):
+        """Same as `admit`, waiting on the event loop instead of blocking a thread"""
+        slot = self.classes[endpoint_class]
+        wait = await slot.acquire_async(priority)
+        start = time.monotonic()
+        try:
+            yield wait
+        finally:
+            slot.release(time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        return {name: slot.stats() for name, slot in self.classes.items()}
+
+
+def admission(endpoint_class: str, priority: int = Priority.NORMAL):
+    """
+    FastAPI dependency guarding an endpoint with the scheduler.
+
+    The priority lane is fixed per route on the server side. Waiting happens
+    on the event loop, so queued requests do not tie up threadpool workers
+    needed by cheap sync endpoints. Rejections are turned into 429 responses
+    carrying a Retry-After header, and the queue wait is reported in the
+    `X-Queue-Wait` response header.
+    """
+    async def dependency(response: Response):
+        try:
+            async with scheduler.admit_async(endpoint_class, priority) as wait:
+                response.headers["X-Queue-Wait"] = f"{wait:.3f}"
+                yield
+        except QueueFullError as e:
+            raise too_many_requests(e)
+
+    return dependency
+
+
+# Global instance
+scheduler = Scheduler()
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
+from app.core.scheduler import admission
 from app.services.audio_service import text_to_audio
 
 router = APIRouter(prefix="/audio", tags=["Audio"])
@@ -9,7 +10,7 @@ class AudioRequest(BaseModel):
     text: str = Field(..., description="Text to convert to audio")
 
 
-@router.post("/generate")
+@router.post("/generate", dependencies=[Depends(admission("tts"))])
 def generate_audio(req: AudioRequest):
     try:
         audio_url = text_to_audio(req.text)
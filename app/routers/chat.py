@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from app.core.scheduler import admission
 from app.schemas.chat import LearnRequest
 from app.services.learning_agent import generate_course_and_quiz
 from app.services.audio_service import text_to_audio
@@ -6,7 +7,7 @@ from app.services.audio_service import text_to_audio
 router = APIRouter(prefix="/chat", tags=["Learning"])
 
 
-@router.post("/learn")
+@router.post("/learn", dependencies=[Depends(admission("llm"))])
 def learn(req: LearnRequest):
 
     course, quiz = generate_course_and_quiz(req.dict())
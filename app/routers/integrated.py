@@ -1,14 +1,31 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core.scheduler import Priority, QueueFullError, admission, scheduler, too_many_requests
 from app.schemas.chat import LearnRequest
-from app.schemas.complete_course import CompleteCourseResponse, VideoFromScenesRequest
-from app.services.learning_agent import generate_complete_learning_package
-from app.services.video_service import video_service
+from app.schemas.complete_course import (
+    CompleteCourseResponse,
+    CurriculumBatchRequest,
+    VideoFromScenesRequest
+)
+from app.services.learning_agent import (
+    generate_complete_learning_package,
+    generate_learning_packages
+)
+from app.services.video_service import video_render_queue, video_service
+import json
+import queue
+import threading
 import time
 
 router = APIRouter(prefix="/integrated", tags=["Integrated Learning"])
 
 
-@router.post("/complete-course", response_model=CompleteCourseResponse)
+@router.post(
+    "/complete-course",
+    response_model=CompleteCourseResponse,
+    dependencies=[Depends(admission("llm"))]
+)
 def generate_complete_learning_experience(req: LearnRequest):
     """
     Generate a complete learning package in a single LLM inference.
@@ -43,7 +60,7 @@ def generate_complete_learning_experience(req: LearnRequest):
         )
 
 
-@router.post("/video-from-scenes")
+@router.post("/video-from-scenes", dependencies=[Depends(admission("diffusion"))])
 def generate_video_from_scenes(req: VideoFromScenesRequest):
     """
     Generate video from pre-generated scenes.
@@ -88,7 +105,7 @@ def generate_video_from_scenes(req: VideoFromScenesRequest):
 
 
 @router.post("/full-pipeline")
-def generate_full_learning_pipeline(req: LearnRequest):
+async def generate_full_learning_pipeline(req: LearnRequest):
     """
     Complete pipeline: generate content AND create video in one call.
     
@@ -98,7 +115,8 @@ def generate_full_learning_pipeline(req: LearnRequest):
         start_time = time.time()
         
         # Step 1: Generate complete content package
-        complete_data = generate_complete_learning_package(req.dict())
+        async with scheduler.admit_async("llm", Priority.LOW):
+            complete_data = await run_in_threadpool(generate_complete_learning_package, req.dict())
         
         # Step 2: Generate video from the scenes
         video_data = {
@@ -109,7 +127,9 @@ def generate_full_learning_pipeline(req: LearnRequest):
             "scenes": complete_data["video_scenes"]
         }
         
-        video_path = video_service.generate_course_video(video_data)
+        # Only hold the diffusion slot while rendering
+        async with scheduler.admit_async("diffusion", Priority.LOW):
+            video_path = await run_in_threadpool(video_service.generate_course_video, video_data)
         
         total_time = time.time() - start_time
         
@@ -123,8 +143,137 @@ def generate_full_learning_pipeline(req: LearnRequest):
             "message": "Full learning pipeline completed successfully"
         }
         
+    except QueueFullError as e:
+        raise too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Full pipeline generation failed: {str(e)}"
         )
+
+
+def _event(payload):
+    """Serialize one streamed batch event as a JSON line"""
+    return json.dumps(payload) + "\n"
+
+
+@router.post("/batch-complete-course")
+def generate_curriculum_batch(req: CurriculumBatchRequest):
+    """
+    Generate complete learning packages for a whole curriculum.
+    
+    Topics are generated concurrently (up to `max_concurrency` at a time) and
+    streamed back as newline-delimited JSON as soon as each one finishes.
+    Videos are rendered in the background, batched with other queued topics,
+    while course events keep streaming:
+    
+    - `{"type": "course", "index": ..., "course": ..., "quiz": ..., "video_scenes": ...}`
+    - `{"type": "error", "index": ..., "detail": ...}`
+    - `{"type": "video", "index": ..., "video_path": ...}` when `generate_videos` is set
+    - `{"type": "summary", ...}` once every topic is done
+    
+    `index` is the position of the topic in the request list.
+    """
+    params_list = [item.dict() for item in req.requests]
+
+    def stream():
+        start_time = time.time()
+        events = queue.Queue()
+        stop = threading.Event()
+        video_futures = []
+
+        def produce():
+            """Feed finished topics to the stream and queue their videos for rendering"""
+            packages = generate_learning_packages(params_list, req.max_concurrency)
+            try:
+                for index, package in packages:
+                    events.put(("course", index, package))
+                    if stop.is_set():
+                        break
+                    if req.generate_videos and not isinstance(package, Exception):
+                        topic_req = req.requests[index]
+                        future = video_render_queue.submit({
+                            "topic": topic_req.topic,
+                            "style": topic_req.style,
+                            "tone": topic_req.tone,
+                            "language": "fr",
+                            "scenes": package.get("video_scenes")
+                        })
+                        video_futures.append(future)
+                        future.add_done_callback(lambda f, index=index: events.put(("video", index, f)))
+            finally:
+                packages.close()
+                events.put(("courses_done", None, None))
+
+        threading.Thread(target=produce, name="curriculum-batch", daemon=True).start()
+
+        succeeded = 0
+        failed = 0
+        videos_pending = 0
+        courses_done = False
+        try:
+            while not courses_done or videos_pending:
+                kind, index, payload = events.get()
+
+                if kind == "courses_done":
+                    courses_done = True
+                    continue
+
+                topic = req.requests[index].topic
+
+                if kind == "video":
+                    videos_pending -= 1
+                    if payload.cancelled():
+                        continue
+                    if payload.exception() is not None:
+                        yield _event({
+                            "type": "video_error",
+                            "index": index,
+                            "topic": topic,
+                            "detail": f"Video generation failed: {str(payload.exception())}"
+                        })
+                    else:
+                        yield _event({
+                            "type": "video",
+                            "index": index,
+                            "topic": topic,
+                            "video_path": payload.result()
+                        })
+                    continue
+
+                if isinstance(payload, Exception):
+                    failed += 1
+                    yield _event({
+                        "type": "error",
+                        "index": index,
+                        "topic": topic,
+                        "detail": f"Complete course generation failed: {str(payload)}"
+                    })
+                    continue
+
+                succeeded += 1
+                if req.generate_videos:
+                    videos_pending += 1
+                yield _event({
+                    "type": "course",
+                    "index": index,
+                    "topic": topic,
+                    "course": payload["course"],
+                    "quiz": payload["quiz"],
+                    "video_scenes": payload["video_scenes"]
+                })
+
+            yield _event({
+                "type": "summary",
+                "topics": len(params_list),
+                "succeeded": succeeded,
+                "failed": failed,
+                "total_processing_time": time.time() - start_time
+            })
+        finally:
+            # Client went away: stop generating and drop videos not yet rendering
+            stop.set()
+            for future in list(video_futures):
+                future.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
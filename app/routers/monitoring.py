@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from app.core.llm import llm
+from app.core.scheduler import scheduler
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get("/scheduler")
+def scheduler_stats():
+    """
+    Admission control state per endpoint class.
+
+    Reports active and queued requests, rejections and queue wait times
+    so concurrency limits and queue depths can be tuned.
+    """
+    return scheduler.stats()
+
+
+@router.get("/llm")
+def llm_stats():
+    """
+    LLM routing state: rolling latency and error rate per provider,
+    current routing order, hedge delays and hedging outcomes.
+    """
+    return llm.stats()
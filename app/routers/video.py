@@ -1,12 +1,17 @@
 import time
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.scheduler import admission
 from app.schemas.video import VideoRequest, VideoResponse
 from app.services.video_service import video_service
 
 router = APIRouter(prefix="/video", tags=["Video"])
 
 
-@router.post("/generate", response_model=VideoResponse)
+@router.post(
+    "/generate",
+    response_model=VideoResponse,
+    dependencies=[Depends(admission("diffusion"))]
+)
 def generate_course_video(request: VideoRequest):
     """
     Generate a course video based on the provided scenes and settings.
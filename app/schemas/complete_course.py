@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict
+from app.core.config import settings
+from app.schemas.chat import LearnRequest
 
 
 class VideoScene(BaseModel):
@@ -23,3 +25,22 @@ class VideoFromScenesRequest(BaseModel):
     tone: str = Field(default="educational", description="Content tone")
     language: str = Field(default="fr", description="Language for audio")
     scenes: List[VideoScene] = Field(..., description="Pre-generated scenes")
+
+
+class CurriculumBatchRequest(BaseModel):
+    requests: List[LearnRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_TOPICS,
+        description="One learn request per topic of the curriculum"
+    )
+    max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        le=settings.BATCH_MAX_CONCURRENCY,
+        description="Maximum number of topics generated at the same time"
+    )
+    generate_videos: bool = Field(
+        default=False,
+        description="Also render a video per topic, batching scene images across topics"
+    )
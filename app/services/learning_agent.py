@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 from langchain_core.prompts import PromptTemplate
 from app.core.llm import llm
+from app.core.scheduler import Priority, scheduler
 from app.prompts.course_prompt import COURSE_TEMPLATE
 from app.prompts.quiz_prompt import QUIZ_TEMPLATE
 from app.prompts.complete_course_prompt import COMPLETE_COURSE_TEMPLATE
@@ -77,6 +80,42 @@ def generate_complete_learning_package(params):
         return _fallback_generation(params)
 
 
+def generate_learning_packages(params_list, max_concurrency=4):
+    """
+    Generate complete learning packages for several topics concurrently.
+    
+    At most `max_concurrency` topics are in flight, each holding a low
+    priority slot of the "llm" scheduler class so interactive requests
+    keep precedence. A full llm queue only delays a topic, it does not
+    fail it.
+    
+    Yields:
+        tuple: (index, package) as each topic finishes, in completion order.
+        package is the exception instead when generation failed.
+    """
+    stop = threading.Event()
+
+    def generate(params):
+        with scheduler.admit_with_backpressure("llm", Priority.LOW, stop=stop):
+            return generate_complete_learning_package(params)
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="curriculum")
+    try:
+        futures = {
+            executor.submit(generate, params): index
+            for index, params in enumerate(params_list)
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+    finally:
+        # Stop queued topics if the consumer goes away (e.g. client disconnect)
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def _fallback_generation(params):
     """Fallback to separate generation if unified approach fails"""
     print("Falling back to separate generation...")
@@ -1,12 +1,17 @@
 import os
+import queue
+import threading
 import uuid
 import subprocess
 import time
-from typing import Dict
+from concurrent.futures import Future
+from typing import Dict, List
 from gtts import gTTS
 from pydub import AudioSegment
 import torch
 from diffusers import StableDiffusionPipeline
+from app.core.config import settings
+from app.core.scheduler import Priority, scheduler
 
 
 class VideoService:
@@ -33,16 +38,19 @@ class VideoService:
         os.makedirs("tmp/audio", exist_ok=True)
         os.makedirs("output/videos", exist_ok=True)
     
-    def _generate_image(self, prompt: str, idx: int) -> str:
-        """Generate image for a scene"""
-        image = self.pipe(prompt, num_inference_steps=20).images[0]
-        img_path = f"tmp/images/scene_{idx}.png"
-        image.save(img_path)
-        return img_path
+    def _generate_images(self, prompts: List[str], img_paths: List[str]) -> List[str]:
+        """Generate scene images, several prompts per diffusion batch"""
+        batch_size = max(1, settings.DIFFUSION_BATCH_SIZE)
+        for start in range(0, len(prompts), batch_size):
+            batch = prompts[start:start + batch_size]
+            images = self.pipe(batch, num_inference_steps=20).images
+            for image, img_path in zip(images, img_paths[start:start + batch_size]):
+                image.save(img_path)
+        return img_paths
     
-    def _generate_audio(self, text: str, language: str, idx: int) -> tuple:
+    def _generate_audio(self, text: str, language: str, job: str, idx: int) -> tuple:
         """Generate audio for a scene"""
-        audio_mp3 = f"tmp/audio/scene_{idx}.mp3"
+        audio_mp3 = f"tmp/audio/{job}_scene_{idx}.mp3"
         tts = gTTS(text=text, lang=language)
         tts.save(audio_mp3)
         
@@ -55,9 +63,9 @@ class VideoService:
         
         return audio_wav, audio_duration
     
-    def _create_video_segment(self, img_path: str, audio_wav: str, duration: float, idx: int) -> str:
+    def _create_video_segment(self, img_path: str, audio_wav: str, duration: float, job: str, idx: int) -> str:
         """Create a video segment from image and audio"""
-        segment_path = f"tmp/segment_{idx}.mp4"
+        segment_path = f"tmp/{job}_segment_{idx}.mp4"
         subprocess.run([
             "ffmpeg", "-y",
             "-loop", "1", "-i", img_path,
@@ -70,9 +78,9 @@ class VideoService:
         ], check=True)
         return segment_path
     
-    def _concatenate_segments(self, segments: list) -> str:
+    def _concatenate_segments(self, segments: list, job: str) -> str:
         """Concatenate all video segments"""
-        concat_file = "tmp/segments.txt"
+        concat_file = f"tmp/{job}_segments.txt"
         with open(concat_file, "w") as f:
             for seg in segments:
                 f.write(f"file '{os.path.abspath(seg)}'\n")
@@ -89,35 +97,175 @@ class VideoService:
     
     def generate_course_video(self, course_data: Dict) -> str:
         """Generate a complete course video from course data"""
-        start_time = time.time()
+        return self.generate_course_videos([course_data])[0]
+    
+    def generate_scene_images(self, courses: List[Dict]) -> List[tuple]:
+        """
+        Generate the scene images of several courses in shared diffusion batches.
         
+        Returns:
+            list: one (job, img_paths) tuple per course, job being the id
+            used to name that course's temporary files.
+        """
         self._ensure_directories()
+        jobs = [uuid.uuid4().hex[:8] for _ in courses]
+        
+        prompts = []
+        img_paths = []
+        for job, course_data in zip(jobs, courses):
+            for idx, scene in enumerate(course_data["scenes"]):
+                prompts.append(f"{course_data.get('style', 'cartoon')}, {scene['title']}, {scene['content']}")
+                img_paths.append(f"tmp/images/{job}_scene_{idx}.png")
+        self._generate_images(prompts, img_paths)
+        
+        rendered = []
+        start = 0
+        for job, course_data in zip(jobs, courses):
+            end = start + len(course_data["scenes"])
+            rendered.append((job, img_paths[start:end]))
+            start = end
+        return rendered
+    
+    def assemble_course_video(self, course_data: Dict, img_paths: List[str], job: str) -> str:
+        """Narrate each scene over its image and concatenate the segments"""
         segments = []
         
-        for idx, scene in enumerate(course_data["scenes"]):
-            # Generate image
-            prompt = f"{course_data.get('style', 'cartoon')}, {scene['title']}, {scene['content']}"
-            img_path = self._generate_image(prompt, idx)
-            
+        for idx, (scene, img_path) in enumerate(zip(course_data["scenes"], img_paths)):
             # Generate audio
             audio_wav, audio_duration = self._generate_audio(
                 scene["content"], 
                 course_data.get("language", "fr"), 
+                job,
                 idx
             )
             
             # Create video segment
-            segment_path = self._create_video_segment(img_path, audio_wav, audio_duration, idx)
+            segment_path = self._create_video_segment(img_path, audio_wav, audio_duration, job, idx)
             segments.append(segment_path)
         
         # Concatenate all segments
-        output_video = self._concatenate_segments(segments)
+        return self._concatenate_segments(segments, job)
+    
+    def generate_course_videos(self, courses: List[Dict]) -> List[str]:
+        """
+        Generate one video per course.
+        
+        Scene images of all courses are generated together so scenes from
+        different topics share diffusion batches.
+        """
+        start_time = time.time()
+        
+        output_videos = [
+            self.assemble_course_video(course_data, img_paths, job)
+            for course_data, (job, img_paths) in zip(courses, self.generate_scene_images(courses))
+        ]
         
         processing_time = time.time() - start_time
-        print(f"Video generated in {processing_time:.2f} seconds")
+        print(f"{len(output_videos)} video(s) generated in {processing_time:.2f} seconds")
         
-        return output_video
+        return output_videos
+
+
+def validate_scenes(scenes):
+    """Raise ValueError unless `scenes` is a non-empty list of scenes with a title and narration"""
+    if not isinstance(scenes, list) or not scenes:
+        raise ValueError("Video scenes must be a non-empty list")
+    for idx, scene in enumerate(scenes):
+        if not isinstance(scene, dict):
+            raise ValueError(f"Video scene {idx} is not an object")
+        if not isinstance(scene.get("title"), str):
+            raise ValueError(f"Video scene {idx} has no title")
+        if not isinstance(scene.get("content"), str) or not scene["content"].strip():
+            raise ValueError(f"Video scene {idx} has no narration content")
+
+
+class VideoRenderQueue:
+    """
+    Background renderer for course videos.
+    
+    Courses submitted within `batch_window` seconds of each other (up to
+    `max_scenes` scenes in total) share the diffusion pass, so scene images
+    from different topics share diffusion batches. The "diffusion" slot is
+    only held for that pass; narration and ffmpeg run per course afterwards,
+    so one failing course does not fail the others.
+    """
+    
+    def __init__(self, service: VideoService, batch_window: float, max_scenes: int):
+        self.service = service
+        self.batch_window = batch_window
+        self.max_scenes = max_scenes
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+    
+    def submit(self, course_data: Dict) -> Future:
+        """
+        Queue a course for rendering; the future resolves to the video path.
+        
+        Courses with invalid scenes are not queued, their future fails right away.
+        """
+        future = Future()
+        try:
+            validate_scenes(course_data.get("scenes"))
+        except ValueError as e:
+            future.set_exception(e)
+            return future
+        
+        self._queue.put((course_data, future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="video-render", daemon=True)
+                self._worker.start()
+        return future
+    
+    def _collect(self, jobs: list):
+        """Wait for a first course, then gather more until the window closes or the batch is full"""
+        jobs.append(self._queue.get())
+        scenes = len(jobs[0][0]["scenes"])
+        deadline = time.monotonic() + self.batch_window
+        
+        while scenes < self.max_scenes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            scenes += len(job[0]["scenes"])
+        
+        # Drop courses whose requester went away
+        jobs[:] = [(course_data, future) for course_data, future in jobs if future.set_running_or_notify_cancel()]
+    
+    def _render(self, jobs: list):
+        with scheduler.admit_with_backpressure("diffusion", Priority.LOW):
+            rendered = self.service.generate_scene_images([course_data for course_data, _ in jobs])
+        
+        for (course_data, future), (job, img_paths) in zip(jobs, rendered):
+            try:
+                future.set_result(self.service.assemble_course_video(course_data, img_paths, job))
+            except Exception as e:
+                future.set_exception(e)
+    
+    def _run(self):
+        while True:
+            jobs = []
+            try:
+                self._collect(jobs)
+                if jobs:
+                    self._render(jobs)
+            except Exception as e:
+                # Fail what was dequeued, but keep the worker alive for later courses
+                for _, future in jobs:
+                    if not future.done():
+                        future.set_exception(e)
 
 
-# Global instance
+# Global instances
 video_service = VideoService()
+video_render_queue = VideoRenderQueue(
+    video_service,
+    batch_window=settings.VIDEO_RENDER_BATCH_WINDOW,
+    max_scenes=settings.VIDEO_RENDER_MAX_SCENES
+)
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import chat, quiz, audio, video, integrated
+from app.routers import chat, quiz, audio, video, integrated, monitoring
 
 app = FastAPI(
     title="🤖 JANGG AI API",
@@ -23,6 +23,7 @@ app.include_router(quiz.router, prefix="/quiz", tags=["Quiz"])
 app.include_router(audio.router, prefix="/audio", tags=["Audio"])
 app.include_router(video.router, prefix="/video", tags=["Video"])
 app.include_router(integrated.router, prefix="/integrated", tags=["Integrated"])
+app.include_router(monitoring.router)
 
 @app.get("/", include_in_schema=False)
 async def root():
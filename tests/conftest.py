@@ -0,0 +1,19 @@
+import os
+
+# Route LLM calls to the offline fake providers
+os.environ.setdefault("LLM_USE_FAKE_PROVIDERS", "true")
+
+from diffusers import StableDiffusionPipeline  # noqa: E402
+
+
+class _NoWeightsPipeline:
+    """Stands in for Stable Diffusion so importing the app downloads no weights"""
+
+    def to(self, device):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        raise RuntimeError("Stable Diffusion is not available in tests")
+
+
+StableDiffusionPipeline.from_pretrained = classmethod(lambda cls, *args, **kwargs: _NoWeightsPipeline())
@@ -0,0 +1,223 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.scheduler import scheduler
+from app.routers import integrated
+from app.services import learning_agent
+from app.services.learning_agent import generate_learning_packages
+from app.services.video_service import VideoRenderQueue
+
+
+def _params(topic):
+    return {"topic": topic, "sector": "finance", "tone": "friendly", "style": "simple", "length": "short"}
+
+
+def _package(topic, scenes=1):
+    return {
+        "course": f"Course about {topic}",
+        "quiz": [],
+        "video_scenes": [
+            {"title": f"{topic} {idx}", "content": f"Scene {idx} of {topic}", "duration": 5}
+            for idx in range(scenes)
+        ]
+    }
+
+
+class StubVideoService:
+    """Records diffusion passes instead of rendering; ffmpeg fails for `broken` topics"""
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.image_batches = []
+        self.diffusion_slot_held = []
+
+    def generate_scene_images(self, courses):
+        self.image_batches.append([course["topic"] for course in courses])
+        return [(course["topic"], []) for course in courses]
+
+    def assemble_course_video(self, course_data, img_paths, job):
+        self.diffusion_slot_held.append(scheduler.classes["diffusion"].stats()["active"] > 0)
+        if course_data["topic"] in self.broken:
+            raise RuntimeError("ffmpeg failed")
+        return f"output/videos/{job}.mp4"
+
+
+def _course(topic, scenes=1):
+    return {"topic": topic, "style": "cartoon", "language": "fr", "scenes": _package(topic, scenes)["video_scenes"]}
+
+
+@pytest.fixture
+def fake_generation(monkeypatch):
+    """Replace LLM generation: per-topic delay, failure, or custom package"""
+    behaviour = {"delays": {}, "fail": set(), "packages": {}}
+
+    def generate(params):
+        topic = params["topic"]
+        time.sleep(behaviour["delays"].get(topic, 0.01))
+        if topic in behaviour["fail"]:
+            raise ValueError(f"LLM failed for {topic}")
+        return behaviour["packages"].get(topic) or _package(topic)
+
+    monkeypatch.setattr(learning_agent, "generate_complete_learning_package", generate)
+    return behaviour
+
+
+def _stream(body, timeout=10.0):
+    """POST a batch and return its events, failing instead of hanging"""
+    app = FastAPI()
+    app.include_router(integrated.router)
+    result = {}
+
+    def run():
+        response = TestClient(app).post("/integrated/batch-complete-course", json=body)
+        result["events"] = [json.loads(line) for line in response.text.splitlines()]
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "batch stream did not terminate"
+    return result["events"]
+
+
+def test_fan_out_respects_concurrency_cap(monkeypatch):
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def generate(params):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return _package(params["topic"])
+
+    monkeypatch.setattr(learning_agent, "generate_complete_learning_package", generate)
+
+    results = list(generate_learning_packages([_params(f"t{i}") for i in range(10)], max_concurrency=3))
+
+    assert sorted(index for index, _ in results) == list(range(10))
+    assert running["max"] == 3
+
+
+def test_fan_out_yields_in_completion_order_with_errors(fake_generation):
+    fake_generation["delays"] = {"slow": 0.3, "medium": 0.15, "fast": 0.01}
+    fake_generation["fail"] = {"medium"}
+
+    results = list(generate_learning_packages([_params(t) for t in ("slow", "medium", "fast")], max_concurrency=3))
+
+    assert [index for index, _ in results] == [2, 1, 0]
+    assert isinstance(results[1][1], ValueError)
+    assert results[2][1]["course"] == "Course about slow"
+
+
+def test_render_queue_batches_scenes_across_topics():
+    service = StubVideoService()
+    render_queue = VideoRenderQueue(service, batch_window=0.2, max_scenes=100)
+
+    futures = [render_queue.submit(_course(topic, scenes=2)) for topic in ("a", "b", "c")]
+
+    assert [future.result(timeout=5) for future in futures] == [f"output/videos/{t}.mp4" for t in "abc"]
+    assert service.image_batches == [["a", "b", "c"]]
+
+
+def test_render_queue_closes_batch_at_max_scenes():
+    service = StubVideoService()
+    render_queue = VideoRenderQueue(service, batch_window=0.5, max_scenes=4)
+
+    futures = [render_queue.submit(_course(topic, scenes=2)) for topic in ("a", "b", "c")]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert service.image_batches == [["a", "b"], ["c"]]
+
+
+def test_render_queue_isolates_failing_course_and_releases_diffusion_slot():
+    service = StubVideoService(broken={"b"})
+    render_queue = VideoRenderQueue(service, batch_window=0.2, max_scenes=100)
+
+    futures = {topic: render_queue.submit(_course(topic)) for topic in ("a", "b", "c")}
+
+    assert futures["a"].result(timeout=5) == "output/videos/a.mp4"
+    assert futures["c"].result(timeout=5) == "output/videos/c.mp4"
+    with pytest.raises(RuntimeError, match="ffmpeg failed"):
+        futures["b"].result(timeout=5)
+    assert service.diffusion_slot_held == [False, False, False]
+
+
+def test_render_queue_rejects_invalid_scenes_and_keeps_working():
+    service = StubVideoService()
+    render_queue = VideoRenderQueue(service, batch_window=0.05, max_scenes=100)
+
+    for scenes in (None, [], [{"title": "no content"}], "not a list"):
+        with pytest.raises(ValueError):
+            render_queue.submit({"topic": "bad", "scenes": scenes}).result(timeout=1)
+
+    assert render_queue.submit(_course("good")).result(timeout=5) == "output/videos/good.mp4"
+
+
+def test_render_queue_survives_unexpected_worker_errors():
+    service = StubVideoService()
+    render_queue = VideoRenderQueue(service, batch_window=0.05, max_scenes=100)
+    original = service.generate_scene_images
+    service.generate_scene_images = lambda courses: 1 / 0
+
+    with pytest.raises(ZeroDivisionError):
+        render_queue.submit(_course("a")).result(timeout=5)
+
+    service.generate_scene_images = original
+    assert render_queue.submit(_course("b")).result(timeout=5) == "output/videos/b.mp4"
+
+
+def test_stream_reports_courses_in_completion_order_and_errors(fake_generation):
+    fake_generation["delays"] = {"slow": 0.3, "fast": 0.01, "medium": 0.15}
+    fake_generation["fail"] = {"medium"}
+    body = {"requests": [_params(t) for t in ("slow", "fast", "medium")], "max_concurrency": 3}
+
+    events = _stream(body)
+
+    assert [(event["type"], event["index"]) for event in events[:-1]] == [
+        ("course", 1), ("error", 2), ("course", 0)
+    ]
+    assert "LLM failed for medium" in events[1]["detail"]
+    assert events[-1]["type"] == "summary"
+    assert (events[-1]["succeeded"], events[-1]["failed"]) == (2, 1)
+
+
+def test_stream_terminates_with_failed_and_invalid_videos(fake_generation, monkeypatch):
+    fake_generation["packages"] = {"empty": {"course": "c", "quiz": [], "video_scenes": None}}
+    service = StubVideoService(broken={"broken"})
+    monkeypatch.setattr(integrated, "video_render_queue", VideoRenderQueue(service, 0.1, 100))
+    body = {
+        "requests": [_params(t) for t in ("ok", "empty", "broken")],
+        "max_concurrency": 3,
+        "generate_videos": True
+    }
+
+    events = _stream(body)
+
+    videos = {event["topic"]: event["type"] for event in events if event["type"].startswith("video")}
+    assert videos == {"ok": "video", "empty": "video_error", "broken": "video_error"}
+    assert events[-1]["type"] == "summary"
+    assert events[-1]["succeeded"] == 3
+
+
+def test_stream_terminates_when_videos_are_cancelled(fake_generation, monkeypatch):
+    class CancellingQueue:
+        def submit(self, course_data):
+            future = Future()
+            future.cancel()
+            return future
+
+    monkeypatch.setattr(integrated, "video_render_queue", CancellingQueue())
+    body = {"requests": [_params(t) for t in ("a", "b")], "generate_videos": True}
+
+    events = _stream(body)
+
+    assert [event["type"] for event in events] == ["course", "course", "summary"]
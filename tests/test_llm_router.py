@@ -0,0 +1,146 @@
+import json
+import time
+
+from langchain_core.prompts import PromptTemplate
+
+from app.core.llm_router import FakeChatModel, LLMProvider, LLMRouter
+from app.prompts.complete_course_prompt import COMPLETE_COURSE_TEMPLATE
+from app.prompts.course_prompt import COURSE_TEMPLATE
+from app.prompts.quiz_prompt import QUIZ_TEMPLATE
+
+PARAMS = {"topic": "Budgeting", "sector": "finance", "tone": "friendly", "style": "simple", "length": "short"}
+
+
+def _provider(name, samples=(), **fake_options):
+    """Fake provider, optionally with a history of successful call latencies"""
+    provider = LLMProvider(name, FakeChatModel(seed=0, **fake_options))
+    for latency in samples:
+        provider.stats.record(latency, ok=True)
+    return provider
+
+
+def _router(providers, **options):
+    options.setdefault("min_samples", 5)
+    options.setdefault("hedge_min_delay", 0.01)
+    return LLMRouter(providers, **options)
+
+
+def test_no_hedge_when_primary_answers_within_percentile():
+    primary = _provider("primary", samples=[0.2] * 10, latency=0.02)
+    secondary = _provider("secondary", samples=[0.3] * 10, latency=0.02)
+    router = _router([primary, secondary])
+
+    router.invoke("hello")
+
+    assert secondary.model.calls == 0
+    assert router.stats()["hedged"] == 0
+
+
+def test_hedges_after_latency_percentile_and_cancels_loser():
+    # Primary used to answer in ~50ms but is now stuck
+    primary = _provider("primary", samples=[0.05] * 10, latency=2.0)
+    secondary = _provider("secondary", samples=[0.1] * 10, latency=0.05)
+    router = _router([primary, secondary])
+
+    start = time.monotonic()
+    router.invoke("hello")
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5
+    assert secondary.model.calls == 1
+    assert primary.model.cancelled == 1
+    stats = router.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["hedges_in_flight"] == 0
+
+
+def test_provider_losing_hedges_is_demoted_without_skewing_latency():
+    # Used to answer in ~50ms, now never answers before the hedge wins
+    stuck = _provider("stuck", samples=[0.05] * 10, latency=2.0)
+    backup = _provider("backup", samples=[0.1] * 10, latency=0.02)
+    router = _router([stuck, backup])
+
+    for _ in range(15):
+        router.invoke("hello")
+        if router.stats()["routing_order"][0] == "backup":
+            break
+
+    stats = router.stats()
+    assert stats["routing_order"] == ["backup", "stuck"]
+    assert stats["providers"]["stuck"]["error_rate"] == 0.0
+    assert stats["providers"]["stuck"]["lost_rate"] > 0
+    # Cancelled calls never feed the success latencies
+    assert stats["providers"]["stuck"]["p50_latency_seconds"] == 0.05
+    assert stuck.model.calls == stuck.model.cancelled
+
+
+def test_hedge_budget_exhausted_waits_for_primary():
+    primary = _provider("primary", samples=[0.01] * 10, latency=0.1)
+    secondary = _provider("secondary", samples=[0.1] * 10, latency=0.01)
+    router = _router([primary, secondary], max_hedges_in_flight=0)
+
+    router.invoke("hello")
+
+    assert secondary.model.calls == 0
+    assert router.stats()["hedges_skipped"] == 1
+
+
+def test_fails_over_through_whole_ranked_list():
+    first = _provider("a", latency=0.01, failure_rate=1.0)
+    second = _provider("b", latency=0.01, failure_rate=1.0)
+    third = _provider("c", latency=0.01)
+    router = _router([first, second, third], hedge_default_delay=5.0)
+
+    assert router.invoke("hello").content
+    assert third.model.calls == 1
+    assert router.stats()["failovers"] == 2
+
+
+def test_raises_last_error_when_every_provider_fails():
+    router = _router([
+        _provider("a", latency=0.01, failure_rate=1.0),
+        _provider("b", latency=0.01, failure_rate=1.0),
+    ])
+
+    try:
+        router.invoke("hello")
+    except RuntimeError as e:
+        assert "Fake provider failure" in str(e)
+    else:
+        raise AssertionError("expected the provider error to propagate")
+
+
+def test_ranks_unhealthy_provider_last():
+    flaky = _provider("flaky", latency=0.01, failure_rate=1.0)
+    healthy = _provider("healthy", samples=[0.5] * 10, latency=0.01)
+    router = _router([flaky, healthy], hedge_default_delay=0.1)
+
+    assert router.stats()["routing_order"] == ["flaky", "healthy"]
+    for _ in range(5):
+        router.invoke("hello")
+
+    assert router.stats()["routing_order"] == ["healthy", "flaky"]
+    calls = flaky.model.calls
+    router.invoke("hello")
+    assert flaky.model.calls == calls
+
+
+def test_ranks_by_median_latency():
+    slow = _provider("slow", samples=[0.4] * 10)
+    fast = _provider("fast", samples=[0.1] * 10)
+    router = _router([slow, fast])
+
+    assert router.stats()["routing_order"] == ["fast", "slow"]
+
+
+def test_fake_response_matches_prompt_template():
+    model = FakeChatModel(latency=0)
+
+    course = model.invoke(PromptTemplate.from_template(COURSE_TEMPLATE).format(**PARAMS)).content
+    quiz = model.invoke(PromptTemplate.from_template(QUIZ_TEMPLATE).format(course=course)).content
+    package = model.invoke(PromptTemplate.from_template(COMPLETE_COURSE_TEMPLATE).format(**PARAMS)).content
+
+    assert not course.lstrip().startswith(("[", "{"))
+    assert isinstance(json.loads(quiz), list)
+    assert set(json.loads(package)) == {"course", "quiz", "video_scenes"}
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.scheduler import EndpointClass, Priority, QueueFullError, admission, scheduler
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.005)
+
+
+def _queue_waiter(slot, priority, results, name, queued_after=None):
+    """Start a thread that queues on `slot` and records how it was served"""
+    def run():
+        try:
+            slot.acquire(priority)
+        except QueueFullError:
+            results.append(("rejected", name))
+            return
+        results.append(("admitted", name))
+        slot.release(0.0)
+
+    if queued_after is None:
+        queued_after = slot.stats()["queued"] + 1
+    thread = threading.Thread(target=run)
+    thread.start()
+    _wait_until(lambda: slot.stats()["queued"] == queued_after)
+    return thread
+
+
+@pytest.fixture
+def guarded_app(monkeypatch):
+    """App with one endpoint guarded by a dedicated, tiny endpoint class"""
+    slot = EndpointClass("test", max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    monkeypatch.setitem(scheduler.classes, "test", slot)
+
+    app = FastAPI()
+
+    @app.post("/heavy", dependencies=[Depends(admission("test"))])
+    def heavy():
+        return {"ok": True}
+
+    return TestClient(app), slot
+
+
+def test_dispatch_follows_priority_then_arrival_order():
+    slot = EndpointClass("test", max_concurrency=1, max_queue=5, queue_timeout=2.0)
+    slot.acquire()
+    results = []
+    threads = [
+        _queue_waiter(slot, Priority.LOW, results, "low"),
+        _queue_waiter(slot, Priority.NORMAL, results, "normal-1"),
+        _queue_waiter(slot, Priority.HIGH, results, "high"),
+        _queue_waiter(slot, Priority.NORMAL, results, "normal-2"),
+    ]
+
+    slot.release(0.0)
+    for thread in threads:
+        thread.join()
+
+    assert [name for _, name in results] == ["high", "normal-1", "normal-2", "low"]
+    assert slot.stats()["active"] == 0
+
+
+def test_full_queue_returns_429_with_retry_after(guarded_app):
+    client, slot = guarded_app
+    slot.acquire()
+
+    response = client.post("/heavy")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert slot.stats()["rejected"] == 1
+
+
+def test_admitted_request_reports_queue_wait(guarded_app):
+    client, slot = guarded_app
+
+    response = client.post("/heavy")
+
+    assert response.status_code == 200
+    assert float(response.headers["X-Queue-Wait"]) == 0.0
+    assert slot.stats()["active"] == 0
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    slot = EndpointClass("test", max_concurrency=1, max_queue=2, queue_timeout=0.05)
+    slot.acquire()
+
+    with pytest.raises(QueueFullError):
+        slot.acquire()
+
+    assert slot.stats()["queued"] == 0
+    slot.release(0.0)
+    assert slot.acquire() == 0.0
+
+
+def test_cancelled_async_waiter_gives_back_granted_slot():
+    slot = EndpointClass("test", max_concurrency=1, max_queue=2, queue_timeout=2.0)
+
+    async def scenario():
+        await slot.acquire_async()
+        waiter = asyncio.ensure_future(slot.acquire_async())
+        await asyncio.sleep(0.01)
+        assert slot.stats()["queued"] == 1
+
+        # Grant the slot to the waiter, then cancel it before it resumes
+        slot.release(0.0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+
+    assert slot.stats()["active"] == 0
+    assert slot.acquire() == 0.0
+
+
+def test_higher_priority_evicts_newest_lower_priority_ticket():
+    slot = EndpointClass("test", max_concurrency=1, max_queue=2, queue_timeout=2.0)
+    slot.acquire()
+    results = []
+    threads = [
+        _queue_waiter(slot, Priority.LOW, results, "low-1"),
+        _queue_waiter(slot, Priority.LOW, results, "low-2"),
+    ]
+    threads.append(_queue_waiter(slot, Priority.HIGH, results, "high", queued_after=2))
+    _wait_until(lambda: ("rejected", "low-2") in results)
+
+    slot.release(0.0)
+    for thread in threads:
+        thread.join()
+
+    assert results == [("rejected", "low-2"), ("admitted", "high"), ("admitted", "low-1")]
+    assert slot.stats()["evicted"] == 1
+
+
+def test_equal_priority_does_not_evict():
+    slot = EndpointClass("test", max_concurrency=1, max_queue=1, queue_timeout=2.0)
+    slot.acquire()
+    results = []
+    thread = _queue_waiter(slot, Priority.LOW, results, "low")
+
+    with pytest.raises(QueueFullError):
+        slot.acquire(Priority.LOW)
+
+    slot.release(0.0)
+    thread.join()
+    assert results == [("admitted", "low")]
+
+
+def test_background_retries_are_not_counted_as_rejections():
+    slot = EndpointClass("test", max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    slot.acquire()
+
+    with pytest.raises(QueueFullError):
+        slot.acquire(Priority.LOW, background=True)
+
+    stats = slot.stats()
+    assert stats["rejected"] == 0
+    assert stats["backpressure_retries"] == 1